@@ -1,7 +1,8 @@
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, List, Optional
 from fastapi import Depends
 
 from core.config import settings
+from core.exceptions import VersioningDisabledError
 from services import filesystem, json_store, lifecycle
 
 # --- Raw I/O Dependencies ---
@@ -16,9 +17,15 @@ def get_file_reader() -> Callable[[str], str]:
 def get_file_writer() -> Callable[[str, str], None]:
     """
     Returns the function responsible for writing raw text files.
+    The raw path may point into DATA_DIR, so the store caches are
+    dropped after every write.
     Signature: (path: str, content: str) -> None
     """
-    return filesystem.write_text_file
+    def _writer(path: str, content: str) -> None:
+        filesystem.write_text_file(path, content)
+        json_store.clear_cached_documents()
+        
+    return _writer
 
 
 # --- Managed Store Dependencies ---
@@ -35,26 +42,120 @@ def get_json_saver() -> Callable[[str, str, Dict[str, Any]], str]:
     def _saver(collection: str, filename: str, data: Dict[str, Any]) -> str:
         # 1. Compute the path (Pure Logic)
         path = json_store.compute_store_path(settings.DATA_DIR, collection, filename)
-        # 2. Perform the I/O (Side Effect)
-        json_store.save_json_to_disk(path, data)
+        # 2. Perform the I/O (Side Effect), recording the version if enabled
+        if settings.STORE_VERSIONING:
+            json_store.save_json_with_history(
+                path,
+                data,
+                json_store.compute_history_dir(settings.DATA_DIR),
+                collection,
+                filename,
+                chunk_size=settings.STORE_HISTORY_CHUNK_SIZE,
+                max_versions=settings.STORE_HISTORY_MAX_VERSIONS
+            )
+        else:
+            json_store.save_json_to_disk(path, data)
         return path
         
     return _saver
 
-def get_json_loader() -> Callable[[str, str], Dict[str, Any]]:
+def get_json_loader() -> Callable[[str, str, Optional[str], Optional[List[str]]], Any]:
     """
     Returns a callable that loads JSON data from the configured DATA_DIR.
     
-    Signature: (collection, filename) -> dict
+    The document is parsed once and served from an in-memory cache until
+    the file changes. An optional JSON Pointer and/or list of top-level keys
+    narrows the result to the requested part of the document.
+    
+    Signature: (collection, filename, pointer=None, keys=None) -> selected JSON
     """
-    def _loader(collection: str, filename: str) -> Dict[str, Any]:
+    def _loader(
+        collection: str,
+        filename: str,
+        pointer: Optional[str] = None,
+        keys: Optional[List[str]] = None
+    ) -> Any:
         # 1. Compute the path (Pure Logic)
         path = json_store.compute_store_path(settings.DATA_DIR, collection, filename)
         # 2. Perform the I/O (Side Effect)
-        return json_store.load_json_from_disk(path)
+        document = json_store.load_json_cached(path, settings.STORE_CACHE_MAX_BYTES)
+        # 3. Select the requested part (Pure Logic)
+        return json_store.select_from_document(document, pointer, keys)
+        
+    return _loader
+
+def get_json_etag() -> Callable[[str, str], str]:
+    """
+    Returns a callable that computes the ETag of a document in DATA_DIR.
+    
+    Signature: (collection, filename) -> etag
+    """
+    def _etag(collection: str, filename: str) -> str:
+        path = json_store.compute_store_path(settings.DATA_DIR, collection, filename)
+        return json_store.compute_document_etag(path)
+        
+    return _etag
+
+
+# --- Version History Dependencies ---
+
+def get_version_lister() -> Callable[[str, str], List[Dict[str, Any]]]:
+    """
+    Returns a callable that lists the recorded versions of a document.
+    
+    Signature: (collection, filename) -> [version entries, oldest first]
+    """
+    def _lister(collection: str, filename: str) -> List[Dict[str, Any]]:
+        history_dir = json_store.compute_history_dir(settings.DATA_DIR)
+        return json_store.list_versions(history_dir, collection, filename)
+        
+    return _lister
+
+def get_version_loader() -> Callable[[str, str, int], Dict[str, Any]]:
+    """
+    Returns a callable that rebuilds a past version of a document.
+    
+    Signature: (collection, filename, version) -> dict
+    """
+    def _loader(collection: str, filename: str, version: int) -> Dict[str, Any]:
+        history_dir = json_store.compute_history_dir(settings.DATA_DIR)
+        return json_store.load_version(history_dir, collection, filename, version)
         
     return _loader
 
+def get_version_restorer() -> Callable[[str, str, int], str]:
+    """
+    Returns a callable that makes a past version the current document.
+    
+    The restore goes through the regular saver, so it is recorded as a new
+    version. It is refused while STORE_VERSIONING is disabled, since the
+    overwritten document could not be recovered.
+    
+    Signature: (collection, filename, version) -> saved_path
+    """
+    load_version = get_version_loader()
+    save = get_json_saver()
+
+    def _restorer(collection: str, filename: str, version: int) -> str:
+        if not settings.STORE_VERSIONING:
+            raise VersioningDisabledError(
+                "Restoring requires STORE_VERSIONING: the current document would be lost"
+            )
+        return save(collection, filename, load_version(collection, filename, version))
+        
+    return _restorer
+
+def get_history_collector() -> Callable[[], Dict[str, int]]:
+    """
+    Returns a callable that removes history blobs no version references.
+    
+    Signature: () -> {"removed_blobs": int, "freed_bytes": int}
+    """
+    def _collector() -> Dict[str, int]:
+        return json_store.collect_garbage(json_store.compute_history_dir(settings.DATA_DIR))
+        
+    return _collector
+
 
 # --- Lifecycle Dependencies ---
 
@@ -1,12 +1,25 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any, Callable
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
-from domain.schemas import StoreSavePayload, StoreResponse
-from api.dependencies import get_json_saver, get_json_loader
+from domain.schemas import (
+    StoreSavePayload, StoreResponse,
+    StoreBatchGetPayload, StoreBatchGetResponse, StoreBatchGetResult,
+    StoreHistoryResponse, StoreVersionInfo, StoreGcResponse
+)
+from api.dependencies import (
+    get_json_saver, get_json_loader, get_json_etag,
+    get_version_lister, get_version_loader, get_version_restorer, get_history_collector
+)
+from core.exceptions import VersioningDisabledError
+from services import json_store
 
 router = APIRouter()
 
+# Same constraints as StoreSavePayload, for routes that write to the store
+COLLECTION_PATH = Path(..., pattern=r"^[a-zA-Z0-9_]+$")
+FILENAME_PATH = Path(..., pattern=r"^[a-zA-Z0-9_\-]+$")
+
 @router.post("/save", response_model=StoreResponse)
 def save_document(
     payload: StoreSavePayload,
@@ -25,29 +38,184 @@ def save_document(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{collection}/{filename}")
-def get_document(
+def _read_document(
     collection: str,
     filename: str,
-    loader: Callable[[str, str], Dict[str, Any]] = Depends(get_json_loader)
-):
+    pointer: Optional[str],
+    keys: Optional[List[str]],
+    loader: Callable[..., Any],
+    etag_of: Callable[[str, str], str]
+) -> Tuple[str, Any]:
     """
-    Retrieves a JSON document.
-    Returns 404 if the document does not exist.
+    Loads (part of) a document together with its ETag.
+    Translates service errors into HTTPExceptions shared by the single
+    and the batch endpoints.
     """
     try:
-        data = loader(collection, filename)
-        return data
-        
+        etag = etag_of(collection, filename)
+        return etag, loader(collection, filename, pointer, keys)
+
     except FileNotFoundError:
         raise HTTPException(
-            status_code=404, 
+            status_code=404,
             detail=f"Document '{filename}' not found in collection '{collection}'"
         )
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Pointer '{pointer}' does not match any value in document '{filename}'"
+        )
     except json.JSONDecodeError:
         raise HTTPException(
-            status_code=500, 
+            status_code=500,
             detail="The file exists but contains invalid JSON data."
         )
+    except ValueError as e:
+        # Malformed pointer, or projection requested on a non-object value
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch_get", response_model=StoreBatchGetResponse)
+def batch_get_documents(
+    payload: StoreBatchGetPayload,
+    loader: Callable[..., Any] = Depends(get_json_loader),
+    etag_of: Callable[[str, str], str] = Depends(get_json_etag)
+):
+    """
+    Reads several documents (or parts of them) in a single request.
+    Each item reports its own status, so one missing document does not
+    fail the whole batch. Items whose 'etag' is still current get status
+    304 and no data.
+    """
+    results = []
+    for item in payload.items:
+        try:
+            etag = etag_of(item.collection, item.filename) if item.etag else None
+            if etag is not None and json_store.etag_matches(item.etag, etag):
+                results.append(StoreBatchGetResult(status=304, etag=etag))
+                continue
+            etag, data = _read_document(
+                item.collection, item.filename, item.pointer, item.keys, loader, etag_of
+            )
+            results.append(StoreBatchGetResult(status=200, etag=etag, data=data))
+        except FileNotFoundError:
+            results.append(StoreBatchGetResult(
+                status=404,
+                detail=f"Document '{item.filename}' not found in collection '{item.collection}'"
+            ))
+        except HTTPException as e:
+            results.append(StoreBatchGetResult(status=e.status_code, detail=e.detail))
+        except Exception as e:
+            # e.g. PermissionError from the ETag check: fail this item only
+            results.append(StoreBatchGetResult(status=500, detail=str(e)))
+    return StoreBatchGetResponse(results=results)
+
+
+@router.get("/{collection}/{filename}")
+def get_document(
+    collection: str,
+    filename: str,
+    response: Response,
+    pointer: Optional[str] = Query(None, description="RFC 6901 JSON Pointer (e.g. '/columns/3')"),
+    keys: Optional[List[str]] = Query(None, description="Top-level keys to return (repeatable)"),
+    if_none_match: Optional[str] = Header(None),
+    loader: Callable[..., Any] = Depends(get_json_loader),
+    etag_of: Callable[[str, str], str] = Depends(get_json_etag)
+):
+    """
+    Retrieves a JSON document, or only part of it.
+    - pointer: returns the value at the given JSON Pointer.
+    - keys: returns an object with only the given keys (applied after pointer).
+    Returns 404 if the document or the pointer target does not exist.
+    Responses carry an ETag; a matching If-None-Match returns 304 without a body.
+    """
+    if if_none_match:
+        try:
+            etag = etag_of(collection, filename)
+            if json_store.etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+        except Exception:
+            pass  # Reported by _read_document below (e.g. 404)
+
+    etag, data = _read_document(collection, filename, pointer, keys, loader, etag_of)
+    response.headers["ETag"] = etag
+    return data
+
+
+# --- Version History ---
+
+@router.post("/history/gc", response_model=StoreGcResponse)
+def collect_history_garbage(
+    collector: Callable[[], Dict[str, int]] = Depends(get_history_collector)
+):
+    """
+    Deletes history blobs that no remaining version references
+    (e.g. versions dropped by the STORE_HISTORY_MAX_VERSIONS retention).
+    """
+    try:
+        return StoreGcResponse(status="success", **collector())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{collection}/{filename}/history", response_model=StoreHistoryResponse)
+def list_document_versions(
+    collection: str = COLLECTION_PATH,
+    filename: str = FILENAME_PATH,
+    lister: Callable[[str, str], List[Dict[str, Any]]] = Depends(get_version_lister)
+):
+    """
+    Lists the recorded versions of a document, oldest first.
+    Versions are only recorded while STORE_VERSIONING is enabled.
+    """
+    try:
+        versions = [StoreVersionInfo(**v) for v in lister(collection, filename)]
+        return StoreHistoryResponse(collection=collection, filename=filename, versions=versions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{collection}/{filename}/history/{version}")
+def get_document_version(
+    version: int,
+    collection: str = COLLECTION_PATH,
+    filename: str = FILENAME_PATH,
+    version_loader: Callable[[str, str, int], Dict[str, Any]] = Depends(get_version_loader)
+):
+    """
+    Retrieves a past version of a document.
+    Returns 404 if the version does not exist (or was removed by retention).
+    """
+    try:
+        return version_loader(collection, filename, version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{collection}/{filename}/history/{version}/restore", response_model=StoreResponse)
+def restore_document_version(
+    version: int,
+    collection: str = COLLECTION_PATH,
+    filename: str = FILENAME_PATH,
+    restorer: Callable[[str, str, int], str] = Depends(get_version_restorer)
+):
+    """
+    Makes a past version the current document.
+    The restore is a regular save, so it is itself recorded as a new version
+    and can be undone the same way.
+    Returns 409 while STORE_VERSIONING is disabled: nothing would record the
+    document being overwritten.
+    """
+    try:
+        saved_path = restorer(collection, filename, version)
+        return StoreResponse(status="success", path=saved_path)
+    except VersioningDisabledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
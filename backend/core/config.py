@@ -10,6 +10,14 @@ class Settings(BaseSettings):
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     DATA_DIR: str = os.path.join(BASE_DIR, "..", "local_data")
     
+    # Managed Store Read Cache
+    STORE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Total on-disk size of cached parsed documents
+
+    # Managed Store Version History (opt-in)
+    STORE_VERSIONING: bool = False
+    STORE_HISTORY_MAX_VERSIONS: int = 50       # Per document, 0 = keep all
+    STORE_HISTORY_CHUNK_SIZE: int = 16 * 1024  # Target chunk size in bytes, 0 = whole documents
+
     # Frontend Entry Point
     FRONTEND_DIR: str = os.path.join(BASE_DIR, "..", "frontend")
     STARTUP_URL: str = f"http://{APP_HOST}:{APP_PORT}"
@@ -4,4 +4,8 @@ class AppError(Exception):
 
 class SafetyError(AppError):
     """Raised when a path is considered unsafe (e.g. outside allowed directories)."""
-    pass
\ No newline at end of file
+    pass
+
+class VersioningDisabledError(AppError):
+    """Raised when a history operation needs STORE_VERSIONING to be enabled."""
+    pass
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # --- System Domain ---
 
@@ -59,4 +59,55 @@ class StoreSavePayload(BaseModel):
 class StoreResponse(BaseModel):
     """Generic acknowledgment for store operations."""
     status: str
-    path: Optional[str] = None
\ No newline at end of file
+    path: Optional[str] = None
+
+class StoreGetItem(BaseModel):
+    """
+    A single document read inside a batch request.
+    Same constraints as StoreSavePayload for 'collection' and 'filename'.
+    """
+    collection: str = Field(..., min_length=1, pattern=r"^[a-zA-Z0-9_]+$")
+    filename: str = Field(..., min_length=1, pattern=r"^[a-zA-Z0-9_\-]+$")
+    pointer: Optional[str] = Field(None, description="RFC 6901 JSON Pointer (e.g. '/columns/3')")
+    keys: Optional[List[str]] = Field(None, description="Top-level keys to return")
+    etag: Optional[str] = Field(None, description="ETag held by the client; a match returns status 304")
+
+class StoreBatchGetPayload(BaseModel):
+    """Input model for reading several documents in one round-trip."""
+    items: List[StoreGetItem] = Field(..., max_length=100)
+
+class StoreBatchGetResult(BaseModel):
+    """
+    Outcome of one item of a batch read, in the same order as the request.
+    'status' mirrors the HTTP status the single GET would have returned.
+    """
+    status: int
+    etag: Optional[str] = None
+    data: Any = None
+    detail: Optional[str] = None
+
+class StoreBatchGetResponse(BaseModel):
+    """Output model for batch reads."""
+    results: List[StoreBatchGetResult]
+
+
+# --- Version History Domain ---
+
+class StoreVersionInfo(BaseModel):
+    """Metadata of one recorded version of a document."""
+    version: int
+    timestamp: float = Field(..., description="Unix time of the save")
+    size: int = Field(..., description="Size of the serialized document in bytes")
+    sha256: str
+
+class StoreHistoryResponse(BaseModel):
+    """Output model listing the versions of a document, oldest first."""
+    collection: str
+    filename: str
+    versions: List[StoreVersionInfo]
+
+class StoreGcResponse(BaseModel):
+    """Outcome of a history garbage collection."""
+    status: str
+    removed_blobs: int
+    freed_bytes: int
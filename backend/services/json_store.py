@@ -1,6 +1,45 @@
+import hashlib
 import json
 import os
-from typing import Dict, Any
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+# path -> ((mtime_ns, size), parsed document), most recently used last.
+# The total of the 'size' fields is tracked in _parsed_cache_bytes.
+_parsed_cache: "OrderedDict[str, Tuple[Tuple[int, int], Any]]" = OrderedDict()
+_parsed_cache_bytes = 0
+_parsed_cache_lock = threading.Lock()
+
+# Bumped (under _parsed_cache_lock) whenever a document is written: per path
+# by evict_cached_json(), for every path by clear_cached_documents(). A read
+# that started before the bump must not insert what it parsed.
+_cache_generations: Dict[str, int] = {}
+_cache_epoch = 0
+
+# RFC 6901: '~' only as part of the '~0' / '~1' escapes; array indexes are
+# decimal without leading zeros (ASCII digits only).
+_POINTER_TOKEN_RE = re.compile(r"(?:[^~]|~[01])*")
+_ARRAY_INDEX_RE = re.compile(r"0|[1-9][0-9]*")
+
+# path -> ((mtime_ns, size), etag). Lets compute_document_etag() skip
+# re-hashing unchanged files; saves overwrite their entry directly.
+_etag_cache: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_etag_cache_lock = threading.Lock()
+
+# Held by saves from the write until their ETag is recorded, so concurrent
+# saves of a document can't record each other's ETag. ETag inserts made by
+# readers take it too (see compute_document_etag).
+_store_write_lock = threading.Lock()
+
+# Serializes versioned saves, history writes and garbage collection: the log
+# order matches the order documents hit the disk, and GC never removes a blob
+# that a concurrent save is about to reference. Reentrant because
+# record_version() reclaims blobs while holding it.
+_history_lock = threading.RLock()
 
 # --- Pure Functions (Logic) ---
 
@@ -14,19 +53,208 @@ def compute_store_path(base_dir: str, collection: str, filename: str) -> str:
     return os.path.join(base_dir, collection, f"{filename}.json")
 
 
+def parse_json_pointer(pointer: str) -> List[str]:
+    """
+    Pure: Splits an RFC 6901 JSON Pointer into its unescaped reference tokens.
+    The empty string refers to the whole document.
+
+    Raises:
+        ValueError: If the pointer is not a valid JSON Pointer.
+    """
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"JSON Pointer must be empty or start with '/': {pointer!r}")
+
+    tokens = []
+    for raw in pointer[1:].split("/"):
+        if not _POINTER_TOKEN_RE.fullmatch(raw):
+            raise ValueError(f"Invalid escape sequence in JSON Pointer: {pointer!r}")
+        # Order matters: '~1' first, so that '~01' decodes to '~1' and not '/'
+        tokens.append(raw.replace("~1", "/").replace("~0", "~"))
+    return tokens
+
+
+def resolve_json_pointer(document: Any, tokens: List[str]) -> Any:
+    """
+    Pure: Walks the document following the reference tokens.
+
+    Raises:
+        KeyError: If a token does not match any member or array element.
+    """
+    current = document
+    for token in tokens:
+        if isinstance(current, dict):
+            if token not in current:
+                raise KeyError(token)
+            current = current[token]
+        elif isinstance(current, list):
+            # '-' refers to the (nonexistent) element after the last one
+            if not _ARRAY_INDEX_RE.fullmatch(token):
+                raise KeyError(token)
+            index = int(token)
+            if index >= len(current):
+                raise KeyError(token)
+            current = current[index]
+        else:
+            raise KeyError(token)
+    return current
+
+
+def project_keys(document: Any, keys: List[str]) -> Dict[str, Any]:
+    """
+    Pure: Returns a new object containing only the requested top-level keys.
+    Keys missing from the document are omitted from the result.
+
+    Raises:
+        ValueError: If the document is not a JSON object.
+    """
+    if not isinstance(document, dict):
+        raise ValueError("Key projection can only be applied to a JSON object")
+    return {key: document[key] for key in keys if key in document}
+
+
+def select_from_document(
+    document: Any,
+    pointer: Optional[str] = None,
+    keys: Optional[List[str]] = None
+) -> Any:
+    """
+    Pure: Applies an optional JSON Pointer and then an optional key projection.
+    """
+    selected = document
+    if pointer is not None:
+        selected = resolve_json_pointer(selected, parse_json_pointer(pointer))
+    if keys:
+        selected = project_keys(selected, keys)
+    return selected
+
+
+def format_etag(content: bytes) -> str:
+    """
+    Pure: Builds a (quoted) HTTP ETag from the document's serialized content.
+    """
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Pure: Checks an If-None-Match header value against the current ETag.
+    Supports comma-separated lists, weak validators (W/) and '*'.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def serialize_document(data: Dict[str, Any]) -> bytes:
+    """
+    Pure: Serializes a document exactly as it is stored on disk.
+    """
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+# --- Pure Functions (Version History) ---
+
+def compute_history_dir(base_dir: str) -> str:
+    """
+    Pure: Location of the version history inside the data directory.
+    The leading dot can't clash with a collection name (see StoreSavePayload).
+    """
+    return os.path.join(base_dir, ".history")
+
+
+def compute_blob_path(history_dir: str, digest: str) -> str:
+    """
+    Pure: Content-addressed location of a blob: blobs / ab / cdef...
+    """
+    return os.path.join(history_dir, "blobs", digest[:2], digest[2:])
+
+
+def compute_version_log_path(history_dir: str, collection: str, filename: str) -> str:
+    """
+    Pure: Location of the append-only version log of a document.
+    """
+    return os.path.join(history_dir, "logs", collection, f"{filename}.jsonl")
+
+
+def split_into_chunks(content: bytes, target_size: int) -> List[bytes]:
+    """
+    Pure: Content-defined chunking on line boundaries.
+
+    A line ends a chunk when its checksum modulo 'target_size' is below its
+    length, so each byte has about a 1/target_size chance of closing a chunk
+    (as with a rolling hash) and chunks average 'target_size' bytes for any
+    line length. Whether a line is a boundary depends only on that line, not
+    on offsets or on the rest of the document, so an edit only changes the
+    chunks around it (bounded by the min/max chunk size) and the other chunks
+    keep their hash between versions.
+    Documents smaller than 'target_size' (or target_size <= 0) stay whole.
+    """
+    if target_size <= 0 or len(content) <= target_size:
+        return [content]
+
+    lines = content.splitlines(keepends=True)
+    min_size, max_size = target_size // 4, target_size * 4
+
+    chunks = []
+    current: List[bytes] = []
+    current_size = 0
+    for line in lines:
+        current.append(line)
+        current_size += len(line)
+        at_boundary = zlib.crc32(line) % target_size < len(line)
+        if (current_size >= min_size and at_boundary) or current_size >= max_size:
+            chunks.append(b"".join(current))
+            current, current_size = [], 0
+    if current:
+        chunks.append(b"".join(current))
+    return chunks
+
+
+def trim_versions(versions: List[Dict[str, Any]], max_versions: int) -> List[Dict[str, Any]]:
+    """
+    Pure: Retention policy. Keeps the newest 'max_versions' entries
+    (0 or less keeps everything).
+    """
+    if max_versions <= 0 or len(versions) <= max_versions:
+        return versions
+    return versions[-max_versions:]
+
+
 # --- Effect Functions (IO) ---
 
-def save_json_to_disk(path: str, data: Dict[str, Any]) -> None:
+def save_json_to_disk(path: str, data: Dict[str, Any]) -> bytes:
     """
     Impure: Writes the dictionary as a formatted JSON file to the disk.
     Automatically creates the 'collection' folder if it doesn't exist.
+    Returns the bytes written, so callers (e.g. version history) don't
+    have to serialize the document again.
     """
     directory = os.path.dirname(path)
     if not os.path.exists(directory):
         os.makedirs(directory, exist_ok=True)
 
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    content = serialize_document(data)
+    with _store_write_lock:
+        with open(path, 'wb') as f:
+            f.write(content)
+
+        evict_cached_json(path)
+        # Replaces any entry with the same (mtime, size): on filesystems with
+        # coarse timestamps a same-size save can keep the previous signature.
+        stat = os.stat(path)
+        with _etag_cache_lock:
+            _etag_cache[path] = ((stat.st_mtime_ns, stat.st_size), format_etag(content))
+    return content
 
 
 def load_json_from_disk(path: str) -> Dict[str, Any]:
@@ -41,4 +269,310 @@ def load_json_from_disk(path: str) -> Dict[str, Any]:
         raise FileNotFoundError(f"Document not found at path: {path}")
 
     with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
\ No newline at end of file
+        return json.load(f)
+
+
+def load_json_cached(path: str, max_bytes: int) -> Dict[str, Any]:
+    """
+    Impure: Same as load_json_from_disk, but reuses the parsed tree while the
+    file's modification time and size are unchanged.
+    A parsed tree is only cached if the file didn't change while it was read
+    and no save or raw write happened in the meantime, so a same-size write
+    within one timestamp tick can't leave a stale tree behind.
+    The cache holds documents totalling at most 'max_bytes' on disk, evicting
+    the least recently used ones; larger documents are never cached.
+    The returned object is shared between callers and must not be mutated.
+
+    Raises:
+        FileNotFoundError: If the document doesn't exist.
+        json.JSONDecodeError: If the file content is corrupted.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Document not found at path: {path}")
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _parsed_cache_lock:
+        entry = _parsed_cache.get(path)
+        if entry is not None and entry[0] == signature:
+            _parsed_cache.move_to_end(path)
+            return entry[1]
+        generation = (_cache_epoch, _cache_generations.get(path, 0))
+
+    data = load_json_from_disk(path)
+
+    if signature[1] > max_bytes:
+        return data
+    after = os.stat(path)
+    if (after.st_mtime_ns, after.st_size) != signature:
+        return data
+
+    global _parsed_cache_bytes
+    with _parsed_cache_lock:
+        if generation != (_cache_epoch, _cache_generations.get(path, 0)):
+            return data
+        previous = _parsed_cache.pop(path, None)
+        if previous is not None:
+            _parsed_cache_bytes -= previous[0][1]
+        _parsed_cache[path] = (signature, data)
+        _parsed_cache_bytes += signature[1]
+        while _parsed_cache_bytes > max_bytes:
+            _, (evicted_signature, _) = _parsed_cache.popitem(last=False)
+            _parsed_cache_bytes -= evicted_signature[1]
+    return data
+
+
+def compute_document_etag(path: str) -> str:
+    """
+    Impure: Returns the current ETag of a stored document, a hash of its content.
+    Saves record the ETag of what they wrote; otherwise the file is hashed
+    once and the result reused while its modification time and size are
+    unchanged.
+
+    Raises:
+        FileNotFoundError: If the document doesn't exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Document not found at path: {path}")
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _etag_cache_lock:
+        entry = _etag_cache.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+    with _parsed_cache_lock:
+        generation = (_cache_epoch, _cache_generations.get(path, 0))
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    etag = format_etag(content)
+
+    # Only remember the hash if the file didn't change while it was read,
+    # and no save or raw write happened since (their own entry wins)
+    after = os.stat(path)
+    if (after.st_mtime_ns, after.st_size) == signature:
+        with _store_write_lock:
+            with _parsed_cache_lock:
+                unchanged = generation == (_cache_epoch, _cache_generations.get(path, 0))
+            if unchanged:
+                with _etag_cache_lock:
+                    _etag_cache[path] = (signature, etag)
+    return etag
+
+
+def evict_cached_json(path: str) -> None:
+    """
+    Impure: Drops the parsed tree of a document from the in-memory cache
+    and bumps its generation, so reads already in progress don't re-insert it.
+    Called by save_json_to_disk() after every write.
+    """
+    global _parsed_cache_bytes
+    with _parsed_cache_lock:
+        _cache_generations[path] = _cache_generations.get(path, 0) + 1
+        entry = _parsed_cache.pop(path, None)
+        if entry is not None:
+            _parsed_cache_bytes -= entry[0][1]
+
+
+def clear_cached_documents() -> None:
+    """
+    Impure: Drops every cached parsed tree and ETag.
+    Used after raw file writes, which may target a store document.
+    """
+    global _parsed_cache_bytes, _cache_epoch
+    with _store_write_lock:
+        with _parsed_cache_lock:
+            _cache_epoch += 1
+            _parsed_cache.clear()
+            _parsed_cache_bytes = 0
+        with _etag_cache_lock:
+            _etag_cache.clear()
+
+
+# --- Effect Functions (Version History) ---
+
+def _write_atomic(path: str, content: bytes) -> None:
+    """
+    Impure: Writes through a temporary file, so readers never see partial content.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _write_blob(history_dir: str, chunk: bytes) -> str:
+    """
+    Impure: Stores a compressed chunk under its SHA-256 and returns the digest.
+    Chunks that are already stored are not written again.
+    """
+    digest = hashlib.sha256(chunk).hexdigest()
+    blob_path = compute_blob_path(history_dir, digest)
+    if not os.path.exists(blob_path):
+        _write_atomic(blob_path, zlib.compress(chunk))
+    return digest
+
+
+def list_versions(history_dir: str, collection: str, filename: str) -> List[Dict[str, Any]]:
+    """
+    Impure: Reads the version log of a document, oldest first.
+    A document without history returns an empty list.
+    """
+    log_path = compute_version_log_path(history_dir, collection, filename)
+    if not os.path.exists(log_path):
+        return []
+
+    with open(log_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_version(
+    history_dir: str,
+    collection: str,
+    filename: str,
+    content: bytes,
+    chunk_size: int = 0,
+    max_versions: int = 0
+) -> Optional[Dict[str, Any]]:
+    """
+    Impure: Appends the serialized document to its version log.
+    Only chunks not already present in the blob area are written, so storage
+    grows with the changed bytes rather than with the number of saves.
+    When retention drops old versions, the blobs only they referenced are
+    deleted right away.
+    Returns the new log entry, or None if the content equals the latest version.
+    """
+    digest = hashlib.sha256(content).hexdigest()
+
+    with _history_lock:
+        versions = list_versions(history_dir, collection, filename)
+        if versions and versions[-1]["sha256"] == digest:
+            return None
+
+        entry = {
+            "version": versions[-1]["version"] + 1 if versions else 1,
+            "timestamp": time.time(),
+            "size": len(content),
+            "sha256": digest,
+            "chunks": [_write_blob(history_dir, c) for c in split_into_chunks(content, chunk_size)],
+        }
+        versions.append(entry)
+
+        log_path = compute_version_log_path(history_dir, collection, filename)
+        kept = trim_versions(versions, max_versions)
+        if len(kept) == len(versions):
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        else:
+            _write_atomic(log_path, "".join(json.dumps(v) + "\n" for v in kept).encode("utf-8"))
+
+            # Chunks still used by a kept version of this document can't be
+            # garbage; the rest may still be shared with other documents.
+            dropped = {d for v in versions[:len(versions) - len(kept)] for d in v["chunks"]}
+            candidates = dropped - {d for v in kept for d in v["chunks"]}
+            if candidates:
+                collect_garbage(history_dir, candidates)
+        return entry
+
+
+def save_json_with_history(
+    path: str,
+    data: Dict[str, Any],
+    history_dir: str,
+    collection: str,
+    filename: str,
+    chunk_size: int = 0,
+    max_versions: int = 0
+) -> bytes:
+    """
+    Impure: save_json_to_disk followed by record_version, as one step with
+    respect to other saves, so the latest version always matches the file.
+
+    History is best effort: once the document is written, a failure to record
+    its version is reported as a warning and does not fail the save.
+    """
+    with _history_lock:
+        content = save_json_to_disk(path, data)
+        try:
+            record_version(history_dir, collection, filename, content, chunk_size, max_versions)
+        except Exception as e:
+            print(f"[WARNING] Saved '{collection}/{filename}' but could not record its version: {e}")
+        return content
+
+
+def load_version(history_dir: str, collection: str, filename: str, version: int) -> Dict[str, Any]:
+    """
+    Impure: Rebuilds a past version of a document from its chunks.
+
+    Raises:
+        FileNotFoundError: If the version (or one of its blobs) doesn't exist.
+        ValueError: If the rebuilt content doesn't match the recorded hash.
+    """
+    entry = next(
+        (v for v in list_versions(history_dir, collection, filename) if v["version"] == version),
+        None
+    )
+    if entry is None:
+        raise FileNotFoundError(f"Version {version} of '{collection}/{filename}' not found")
+
+    parts = []
+    for digest in entry["chunks"]:
+        blob_path = compute_blob_path(history_dir, digest)
+        if not os.path.exists(blob_path):
+            raise FileNotFoundError(f"Missing history blob: {digest}")
+        with open(blob_path, 'rb') as f:
+            parts.append(zlib.decompress(f.read()))
+
+    content = b"".join(parts)
+    if hashlib.sha256(content).hexdigest() != entry["sha256"]:
+        raise ValueError(f"Version {version} of '{collection}/{filename}' is corrupted")
+    return json.loads(content.decode("utf-8"))
+
+
+def collect_garbage(history_dir: str, candidates: Optional[Set[str]] = None) -> Dict[str, int]:
+    """
+    Impure: Deletes blobs no longer referenced by any version log.
+    Retention calls it with the chunks of the versions it just dropped
+    ('candidates'); without candidates, the whole blob area is swept
+    (e.g. to clean up after an interrupted save).
+    Returns the number of removed blobs and the bytes freed.
+    """
+    logs_dir = os.path.join(history_dir, "logs")
+    blobs_dir = os.path.join(history_dir, "blobs")
+    removed, freed = 0, 0
+
+    with _history_lock:
+        referenced = set()
+        for root, _, files in os.walk(logs_dir):
+            for name in files:
+                if not name.endswith(".jsonl"):
+                    continue
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            referenced.update(json.loads(line)["chunks"])
+
+        if candidates is None:
+            blob_paths = [
+                os.path.join(root, name)
+                for root, _, files in os.walk(blobs_dir)
+                for name in files
+            ]
+        else:
+            blob_paths = [compute_blob_path(history_dir, d) for d in candidates]
+
+        for blob_path in blob_paths:
+            digest = os.path.basename(os.path.dirname(blob_path)) + os.path.basename(blob_path)
+            if digest in referenced or not os.path.exists(blob_path):
+                continue
+            freed += os.path.getsize(blob_path)
+            os.remove(blob_path)
+            removed += 1
+
+    return {"removed_blobs": removed, "freed_bytes": freed}
@@ -31,4 +31,204 @@ def test_store_workflow(test_client, temp_data_dir):
 
 def test_store_not_found(test_client, temp_data_dir):
     response = test_client.get("/store/tests/non_existent")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_store_partial_read(test_client, temp_data_dir):
+    payload = {
+        "collection": "tests",
+        "filename": "board",
+        "data": {"title": "Board", "owner": "me", "columns": [{"name": "todo"}, {"name": "done"}]}
+    }
+    test_client.post("/store/save", json=payload)
+
+    resp = test_client.get("/store/tests/board", params={"pointer": "/columns/1"})
+    assert resp.status_code == 200
+    assert resp.json() == {"name": "done"}
+
+    resp = test_client.get("/store/tests/board", params={"keys": ["title", "owner"]})
+    assert resp.status_code == 200
+    assert resp.json() == {"title": "Board", "owner": "me"}
+
+    assert test_client.get("/store/tests/board", params={"pointer": "/columns/9"}).status_code == 404
+    assert test_client.get("/store/tests/board", params={"pointer": "columns"}).status_code == 400
+
+    # A new save must not be hidden by the parsed-document cache
+    payload["data"]["columns"][1]["name"] = "archived"
+    test_client.post("/store/save", json=payload)
+    resp = test_client.get("/store/tests/board", params={"pointer": "/columns/1/name"})
+    assert resp.json() == "archived"
+
+def test_store_read_after_raw_write(test_client, temp_data_dir):
+    import os
+    test_client.post("/store/save", json={"collection": "tests", "filename": "raw", "data": {"v": "A"}})
+    assert test_client.get("/store/tests/raw").json() == {"v": "A"}
+    path = os.path.join(temp_data_dir, "tests", "raw.json")
+    mtime = os.stat(path).st_mtime_ns
+
+    # Same size and (coarse) mtime: only the raw write itself can invalidate
+    content = open(path, encoding="utf-8").read().replace('"A"', '"B"')
+    assert test_client.post("/io/write_text", json={"path": path, "content": content}).status_code == 200
+    os.utime(path, ns=(mtime, mtime))
+
+    assert test_client.get("/store/tests/raw").json() == {"v": "B"}
+
+def test_store_etag_revalidation(test_client, temp_data_dir):
+    payload = {"collection": "tests", "filename": "etag_doc", "data": {"v": 1}}
+    test_client.post("/store/save", json=payload)
+
+    first = test_client.get("/store/tests/etag_doc")
+    etag = first.headers["etag"]
+    assert etag
+
+    cached = test_client.get("/store/tests/etag_doc", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    payload["data"] = {"v": 2, "extra": True}
+    test_client.post("/store/save", json=payload)
+    fresh = test_client.get("/store/tests/etag_doc", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json() == {"v": 2, "extra": True}
+
+def test_store_etag_changes_on_same_size_save(test_client, temp_data_dir):
+    """
+    Simulates a filesystem with coarse timestamps: the second save has the
+    same size and the same mtime as the first one.
+    """
+    import os
+    payload = {"collection": "tests", "filename": "same_size", "data": {"v": 1}}
+    test_client.post("/store/save", json=payload)
+    path = os.path.join(temp_data_dir, "tests", "same_size.json")
+    first_mtime = os.stat(path).st_mtime_ns
+    etag = test_client.get("/store/tests/same_size").headers["etag"]
+
+    payload["data"] = {"v": 2}
+    test_client.post("/store/save", json=payload)
+    os.utime(path, ns=(first_mtime, first_mtime))
+
+    resp = test_client.get("/store/tests/same_size", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert resp.json() == {"v": 2}
+
+def test_store_batch_get(test_client, temp_data_dir):
+    test_client.post("/store/save", json={"collection": "tests", "filename": "a", "data": {"n": 1}})
+    test_client.post("/store/save", json={"collection": "tests", "filename": "b", "data": {"n": 2, "m": 3}})
+    etag_a = test_client.get("/store/tests/a").headers["etag"]
+
+    resp = test_client.post("/store/batch_get", json={"items": [
+        {"collection": "tests", "filename": "a", "etag": etag_a},
+        {"collection": "tests", "filename": "b", "keys": ["m"]},
+        {"collection": "tests", "filename": "missing"},
+        {"collection": "tests", "filename": "b", "pointer": "/nope"},
+    ]})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+
+    assert results[0]["status"] == 304 and results[0]["data"] is None
+    assert results[1]["status"] == 200 and results[1]["data"] == {"m": 3}
+    assert results[2]["status"] == 404
+    assert results[3]["status"] == 404
+
+def test_store_version_history(test_client, temp_data_dir, monkeypatch):
+    from core.config import settings
+    monkeypatch.setattr(settings, "STORE_VERSIONING", True)
+    monkeypatch.setattr(settings, "STORE_HISTORY_MAX_VERSIONS", 3)
+
+    payload = {"collection": "tests", "filename": "versioned", "data": {"rev": 1}}
+    for rev in (1, 1, 2, 3):
+        payload["data"] = {"rev": rev}
+        test_client.post("/store/save", json=payload)
+
+    # Saving identical content twice records a single version
+    history = test_client.get("/store/tests/versioned/history").json()
+    assert [v["version"] for v in history["versions"]] == [1, 2, 3]
+
+    assert test_client.get("/store/tests/versioned/history/1").json() == {"rev": 1}
+    assert test_client.get("/store/tests/versioned/history/9").status_code == 404
+
+    # Restoring is a new save: it becomes version 4 and retention drops version 1
+    assert test_client.post("/store/tests/versioned/history/1/restore").status_code == 200
+    assert test_client.get("/store/tests/versioned").json() == {"rev": 1}
+    history = test_client.get("/store/tests/versioned/history").json()
+    assert [v["version"] for v in history["versions"]] == [2, 3, 4]
+
+    # Version 1 and 4 share a blob, so dropping version 1 freed nothing
+    assert _count_blobs(temp_data_dir) == 3
+
+    payload["data"] = {"rev": 5}
+    test_client.post("/store/save", json=payload)  # drops version 2 and its blob
+    assert _count_blobs(temp_data_dir) == 3
+    assert test_client.post("/store/history/gc").json()["removed_blobs"] == 0
+    assert test_client.get("/store/tests/versioned/history/3").json() == {"rev": 3}
+
+def test_store_restore_requires_versioning(test_client, temp_data_dir, monkeypatch):
+    from core.config import settings
+    monkeypatch.setattr(settings, "STORE_VERSIONING", True)
+    payload = {"collection": "tests", "filename": "restorable", "data": {"rev": 1}}
+    test_client.post("/store/save", json=payload)
+
+    # Saved while versioning is off: restoring would lose this document for good
+    monkeypatch.setattr(settings, "STORE_VERSIONING", False)
+    payload["data"] = {"rev": 2}
+    test_client.post("/store/save", json=payload)
+
+    assert test_client.post("/store/tests/restorable/history/1/restore").status_code == 409
+    assert test_client.get("/store/tests/restorable").json() == {"rev": 2}
+
+def _count_blobs(data_dir):
+    import os
+    blobs_dir = os.path.join(data_dir, ".history", "blobs")
+    return sum(len(files) for _, _, files in os.walk(blobs_dir))
+
+def test_store_history_retention_reclaims_blobs(test_client, temp_data_dir, monkeypatch):
+    from core.config import settings
+    monkeypatch.setattr(settings, "STORE_VERSIONING", True)
+    monkeypatch.setattr(settings, "STORE_HISTORY_MAX_VERSIONS", 3)
+
+    # A second document shares its content with the first save of 'busy'
+    test_client.post("/store/save", json={"collection": "tests", "filename": "other", "data": {"rev": 0}})
+    for rev in range(100):
+        test_client.post("/store/save", json={"collection": "tests", "filename": "busy", "data": {"rev": rev}})
+
+    # Without calling gc: 3 versions of 'busy' plus the blob still used by 'other'
+    assert _count_blobs(temp_data_dir) == 4
+    assert test_client.get("/store/tests/other/history/1").json() == {"rev": 0}
+
+def test_store_save_survives_history_failure(test_client, temp_data_dir, monkeypatch):
+    from core.config import settings
+    from services import json_store
+    monkeypatch.setattr(settings, "STORE_VERSIONING", True)
+
+    def _broken(*args, **kwargs):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(json_store, "record_version", _broken)
+
+    payload = {"collection": "tests", "filename": "unrecorded", "data": {"v": 1}}
+    assert test_client.post("/store/save", json=payload).status_code == 200
+    assert test_client.get("/store/tests/unrecorded").json() == {"v": 1}
+
+def test_store_batch_get_isolates_item_errors(test_client, temp_data_dir):
+    from main import app
+    from api.dependencies import get_json_etag
+
+    test_client.post("/store/save", json={"collection": "tests", "filename": "ok", "data": {"n": 1}})
+    real_etag = get_json_etag()
+
+    def _etag(collection, filename):
+        if filename == "locked":
+            raise PermissionError("Permission denied")
+        return real_etag(collection, filename)
+
+    app.dependency_overrides[get_json_etag] = lambda: _etag
+    try:
+        resp = test_client.post("/store/batch_get", json={"items": [
+            {"collection": "tests", "filename": "locked", "etag": '"stale"'},
+            {"collection": "tests", "filename": "ok"},
+        ]})
+    finally:
+        del app.dependency_overrides[get_json_etag]
+
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert results[0]["status"] == 500
+    assert results[1]["status"] == 200 and results[1]["data"] == {"n": 1}
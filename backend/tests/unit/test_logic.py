@@ -1,3 +1,5 @@
+import pytest
+import threading
 from services import filesystem, json_store
 import os
 
@@ -22,4 +24,149 @@ def test_compute_store_path():
     expected = os.path.join(base, col, f"{doc}.json")
     result = json_store.compute_store_path(base, col, doc)
     
-    assert result == expected
\ No newline at end of file
+    assert result == expected
+
+def test_parse_json_pointer():
+    assert json_store.parse_json_pointer("") == []
+    assert json_store.parse_json_pointer("/columns/3") == ["columns", "3"]
+    # '~1' decodes to '/', '~0' to '~', and '~01' to the literal '~1'
+    assert json_store.parse_json_pointer("/a~1b/m~0n/~01") == ["a/b", "m~n", "~1"]
+
+    with pytest.raises(ValueError):
+        json_store.parse_json_pointer("columns")
+    with pytest.raises(ValueError):
+        json_store.parse_json_pointer("/bad~2escape")
+    with pytest.raises(ValueError):
+        json_store.parse_json_pointer("/~~01")
+
+def test_select_from_document():
+    doc = {"title": "Board", "owner": "me", "columns": [{"name": "todo"}, {"name": "done"}]}
+
+    assert json_store.select_from_document(doc) is doc
+    assert json_store.select_from_document(doc, pointer="/columns/1/name") == "done"
+    assert json_store.select_from_document(doc, keys=["title", "missing"]) == {"title": "Board"}
+    assert json_store.select_from_document(doc, pointer="/columns/0", keys=["name"]) == {"name": "todo"}
+
+    for pointer in ("/nope", "/columns/2", "/columns/01", "/columns/-", "/columns/\u00b2", "/title/x"):
+        with pytest.raises(KeyError):
+            json_store.select_from_document(doc, pointer=pointer)
+    with pytest.raises(ValueError):
+        json_store.select_from_document(doc, pointer="/columns", keys=["name"])
+
+def test_etag_matches():
+    etag = json_store.format_etag(b'{"v": 1}')
+
+    assert json_store.etag_matches(etag, etag) is True
+    assert json_store.etag_matches(f'"other", W/{etag}', etag) is True
+    assert json_store.etag_matches("*", etag) is True
+    assert json_store.etag_matches('"other"', etag) is False
+    assert json_store.etag_matches(None, etag) is False
+
+def test_split_into_chunks():
+    doc = {"columns": [{"id": i, "name": f"task {i}", "done": i % 3 == 0} for i in range(2000)]}
+    content = json_store.serialize_document(doc)
+
+    # Small documents and disabled chunking keep a single blob
+    assert json_store.split_into_chunks(content, 0) == [content]
+    assert json_store.split_into_chunks(b'{"a": 1}', 1024) == [b'{"a": 1}']
+
+    chunks = json_store.split_into_chunks(content, 4096)
+    assert len(chunks) > 1
+    assert b"".join(chunks) == content
+
+    # Editing one task only changes the chunks around it
+    doc["columns"][1000]["name"] = "renamed"
+    edited = json_store.split_into_chunks(json_store.serialize_document(doc), 4096)
+    assert len(set(edited) - set(chunks)) <= 2
+
+def test_split_into_chunks_stable_as_document_grows():
+    """
+    Appending long rows changes the document's average line length; chunk
+    boundaries must not depend on it, or every chunk would be stored again.
+    """
+    doc = {"rows": [{"id": i, "name": f"task {i}", "done": i % 3 == 0} for i in range(4000)]}
+    previous = json_store.split_into_chunks(json_store.serialize_document(doc), 16 * 1024)
+
+    for k in range(8):
+        doc["rows"].append({"id": -k, "blob": "x" * 3000})
+        chunks = json_store.split_into_chunks(json_store.serialize_document(doc), 16 * 1024)
+        assert len(set(chunks) - set(previous)) <= 2
+        previous = chunks
+
+def test_trim_versions():
+    versions = [{"version": i} for i in range(1, 6)]
+
+    assert json_store.trim_versions(versions, 0) == versions
+    assert json_store.trim_versions(versions, 10) == versions
+    assert json_store.trim_versions(versions, 2) == [{"version": 4}, {"version": 5}]
+
+def test_load_json_cached_is_bounded_by_bytes(tmp_path):
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"doc{i}.json")
+        json_store.save_json_to_disk(path, {"items": list(range(200))})
+        paths.append(path)
+    size = os.path.getsize(paths[0])
+
+    # Room for two documents: loading the third evicts the least recently used
+    for path in paths:
+        json_store.load_json_cached(path, max_bytes=2 * size)
+    assert paths[0] not in json_store._parsed_cache
+    assert paths[1] in json_store._parsed_cache and paths[2] in json_store._parsed_cache
+
+    # A document larger than the whole budget is returned but never cached
+    json_store.evict_cached_json(paths[1])
+    json_store.evict_cached_json(paths[2])
+    assert json_store.load_json_cached(paths[0], max_bytes=size - 1) == {"items": list(range(200))}
+    assert paths[0] not in json_store._parsed_cache
+
+def test_load_json_cached_drops_tree_parsed_during_a_save(tmp_path, monkeypatch):
+    """
+    A same-size save lands while the old content is being parsed, and keeps
+    the old mtime (coarse timestamps): the old tree must not be cached.
+    """
+    path = str(tmp_path / "doc.json")
+    json_store.save_json_to_disk(path, {"v": "A"})
+    mtime = os.stat(path).st_mtime_ns
+    real_load = json_store.load_json_from_disk
+
+    def _load_then_save(p):
+        data = real_load(p)
+        json_store.save_json_to_disk(p, {"v": "B"})
+        os.utime(p, ns=(mtime, mtime))
+        return data
+
+    monkeypatch.setattr(json_store, "load_json_from_disk", _load_then_save)
+    assert json_store.load_json_cached(path, max_bytes=1024) == {"v": "A"}
+    monkeypatch.setattr(json_store, "load_json_from_disk", real_load)
+
+    assert json_store.load_json_cached(path, max_bytes=1024) == {"v": "B"}
+
+def test_concurrent_saves_record_the_etag_of_the_file(tmp_path, monkeypatch):
+    """
+    Save A is paused right after writing while save B runs: B must not be able
+    to write in between, or A would record its ETag against B's file.
+    """
+    path = str(tmp_path / "doc.json")
+    json_store.save_json_to_disk(path, {"v": "0"})
+    real_evict = json_store.evict_cached_json
+    b_done = threading.Event()
+    started = []
+
+    def _save_b():
+        json_store.save_json_to_disk(path, {"v": "B"})
+        b_done.set()
+
+    def _evict_and_let_b_run(p):
+        if not started:
+            started.append(True)
+            threading.Thread(target=_save_b).start()
+            b_done.wait(0.3)
+        real_evict(p)
+
+    monkeypatch.setattr(json_store, "evict_cached_json", _evict_and_let_b_run)
+    json_store.save_json_to_disk(path, {"v": "A"})
+    assert b_done.wait(5)
+
+    with open(path, 'rb') as f:
+        assert json_store.compute_document_etag(path) == json_store.format_etag(f.read())
@@ -5,10 +5,14 @@
 
 const API_BASE = ""; // Relative path since we are served by FastAPI
 const WS_BASE = `ws://${window.location.host}`;
+const BATCH_MAX_ITEMS = 100; // Mirrors StoreBatchGetPayload.items max_length on the server
 
 class PlatformBridge {
     constructor() {
         this.socket = null;
+
+        // Opt-in store cache (see enableCache). Disabled by default.
+        this.cache = null;
     }
 
     /**
@@ -31,11 +35,47 @@ class PlatformBridge {
         };
     }
 
+    /**
+     * Enables the client-side cache for store reads.
+     * - Identical concurrent store.get calls share a single request.
+     * - Documents are kept in a bounded LRU and revalidated with ETags.
+     * - store.get calls made in the same tick are sent as one batch request.
+     * Entries are invalidated by local store.save / io.write calls.
+     * @param {object} options
+     * @param {number} options.maxEntries - LRU size (default 100)
+     * @param {boolean} options.batch - Coalesce same-tick reads (default true)
+     */
+    enableCache({ maxEntries = 100, batch = true } = {}) {
+        this.cache = {
+            maxEntries,
+            batch,
+            entries: new Map(),   // key -> { etag, data }, most recently used last
+            inflight: new Map(),  // key -> Promise of data
+            queue: []             // pending batched reads for the current tick
+        };
+    }
+
+    /**
+     * Disables the store cache and drops all cached documents.
+     */
+    disableCache() {
+        this.cache = null;
+    }
+
     /**
      * Internal helper for HTTP requests.
      */
     async _request(method, endpoint, body = null) {
-        const headers = { 'Content-Type': 'application/json' };
+        const response = await this._fetch(method, endpoint, body);
+        return response.json();
+    }
+
+    /**
+     * Internal helper returning the raw Response.
+     * Throws on HTTP errors; 304 Not Modified is passed through.
+     */
+    async _fetch(method, endpoint, body = null, extraHeaders = {}) {
+        const headers = { 'Content-Type': 'application/json', ...extraHeaders };
         const config = { method, headers };
 
         if (body) {
@@ -45,7 +85,7 @@ class PlatformBridge {
         const response = await fetch(`${API_BASE}${endpoint}`, config);
 
         // Check for HTTP errors
-        if (!response.ok) {
+        if (!response.ok && response.status !== 304) {
             let errorMsg = response.statusText;
             try {
                 const errorBody = await response.json();
@@ -55,7 +95,154 @@ class PlatformBridge {
             throw new Error(`[API Error ${response.status}] ${errorMsg}`);
         }
 
-        return response.json();
+        return response;
+    }
+
+    // --- Store Cache (internal) ---
+
+    /**
+     * Builds the store URL for a document, with optional pointer / keys.
+     * Also used as the cache key.
+     */
+    _storeUrl(collection, filename, { pointer = null, keys = null } = {}) {
+        const params = new URLSearchParams();
+        if (pointer !== null) params.append('pointer', pointer);
+        if (keys) keys.forEach((k) => params.append('keys', k));
+        const query = params.toString();
+        return `/store/${collection}/${filename}${query ? `?${query}` : ''}`;
+    }
+
+    _cacheLookup(key) {
+        const entry = this.cache.entries.get(key);
+        if (entry) {
+            // Refresh LRU position
+            this.cache.entries.delete(key);
+            this.cache.entries.set(key, entry);
+        }
+        return entry;
+    }
+
+    _cacheStore(key, etag, data) {
+        const { entries, maxEntries } = this.cache;
+        entries.delete(key);
+        if (!etag) return;
+        entries.set(key, { etag, data });
+        while (entries.size > maxEntries) {
+            entries.delete(entries.keys().next().value);
+        }
+    }
+
+    /**
+     * Drops every cached read of a document (all pointer / keys variants).
+     * Without arguments, drops the whole cache.
+     */
+    _cacheInvalidate(collection = null, filename = null) {
+        if (!this.cache) return;
+        const base = `/store/${collection}/${filename}`;
+        const matches = (key) => collection === null || key === base || key.startsWith(`${base}?`);
+
+        for (const key of [...this.cache.entries.keys()]) {
+            if (matches(key)) this.cache.entries.delete(key);
+        }
+        // Reads started before the write may return stale data: don't share them
+        for (const key of [...this.cache.inflight.keys()]) {
+            if (matches(key)) this.cache.inflight.delete(key);
+        }
+    }
+
+    /**
+     * Cached store read: dedups in-flight requests, then either queues
+     * the read for the next batch or revalidates it on its own.
+     */
+    _cachedGet(collection, filename, options) {
+        const key = this._storeUrl(collection, filename, options);
+        const { inflight } = this.cache;
+
+        if (!inflight.has(key)) {
+            const cached = this._cacheLookup(key);
+            const pending = this.cache.batch
+                ? this._enqueueBatchGet(key, collection, filename, options, cached)
+                : this._revalidate(key, cached);
+
+            const shared = pending.finally(() => {
+                if (inflight.get(key) === shared) inflight.delete(key);
+            });
+            inflight.set(key, shared);
+        }
+
+        // Callers get their own copy, so mutating it can't corrupt the cache
+        return inflight.get(key).then((data) => structuredClone(data));
+    }
+
+    async _revalidate(key, cached) {
+        const headers = cached ? { 'If-None-Match': cached.etag } : {};
+        const response = await this._fetch('GET', key, null, headers);
+
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
+        const data = await response.json();
+        if (this.cache) this._cacheStore(key, response.headers.get('ETag'), data);
+        return data;
+    }
+
+    _enqueueBatchGet(key, collection, filename, { pointer = null, keys = null } = {}, cached) {
+        const cache = this.cache;
+        return new Promise((resolve, reject) => {
+            const queue = cache.queue;
+            queue.push({ key, cached, resolve, reject, item: {
+                collection, filename, pointer, keys, etag: cached ? cached.etag : null
+            } });
+            if (queue.length === 1) {
+                queueMicrotask(() => this._flushBatch(cache));
+            }
+        });
+    }
+
+    async _flushBatch(cache) {
+        const queue = cache.queue;
+        cache.queue = [];
+
+        // A lone read doesn't need the batch envelope
+        if (queue.length === 1) {
+            const [pending] = queue;
+            this._revalidate(pending.key, pending.cached).then(pending.resolve, pending.reject);
+            return;
+        }
+
+        // Stay within the server's batch size limit
+        for (let start = 0; start < queue.length; start += BATCH_MAX_ITEMS) {
+            this._sendBatch(queue.slice(start, start + BATCH_MAX_ITEMS));
+        }
+    }
+
+    async _sendBatch(group) {
+        let results;
+        try {
+            const body = await this._request('POST', '/store/batch_get', {
+                items: group.map((p) => p.item)
+            });
+            results = body.results;
+        } catch (e) {
+            // Server without batch support (or transport error): fall back to single reads
+            group.forEach((p) => this._revalidate(p.key, p.cached).then(p.resolve, p.reject));
+            return;
+        }
+
+        group.forEach((pending, i) => {
+            const result = results[i];
+            if (result.status === 304 && pending.cached) {
+                pending.resolve(pending.cached.data);
+            } else if (result.status === 304) {
+                // Nothing cached to fall back on: fetch the document itself
+                this._revalidate(pending.key, null).then(pending.resolve, pending.reject);
+            } else if (result.status === 200) {
+                if (this.cache) this._cacheStore(pending.key, result.etag, result.data);
+                pending.resolve(result.data);
+            } else {
+                pending.reject(new Error(`[API Error ${result.status}] ${result.detail}`));
+            }
+        });
     }
 
     // --- System Domain ---
@@ -75,7 +262,10 @@ class PlatformBridge {
             return result.content;
         },
         write: async (path, content) => {
-            return await this._request('POST', '/io/write_text', { path, content });
+            const result = await this._request('POST', '/io/write_text', { path, content });
+            // A raw write may target a store file: drop all cached documents
+            this._cacheInvalidate();
+            return result;
         }
     };
 
@@ -88,20 +278,71 @@ class PlatformBridge {
          * @param {object} data - The data object
          */
         save: async (collection, filename, data) => {
-            return await this._request('POST', '/store/save', {
+            this._cacheInvalidate(collection, filename);
+            const result = await this._request('POST', '/store/save', {
                 collection,
                 filename,
                 data
             });
+            this._cacheInvalidate(collection, filename);
+            return result;
         },
 
         /**
-         * Loads a JSON object.
+         * Loads a JSON object, or only part of it.
          * @param {string} collection 
          * @param {string} filename 
+         * @param {object} options - Optional { pointer: '/columns/3', keys: ['title'] }
+         */
+        get: async (collection, filename, options = {}) => {
+            if (this.cache) {
+                return await this._cachedGet(collection, filename, options);
+            }
+            return await this._request('GET', this._storeUrl(collection, filename, options));
+        },
+
+        /**
+         * Lists the recorded versions of a document (requires STORE_VERSIONING).
+         * @param {string} collection 
+         * @param {string} filename 
+         */
+        history: async (collection, filename) => {
+            const result = await this._request('GET', `/store/${collection}/${filename}/history`);
+            return result.versions;
+        },
+
+        /**
+         * Loads a past version of a document.
+         * @param {string} collection 
+         * @param {string} filename 
+         * @param {number} version 
+         */
+        getVersion: async (collection, filename, version) => {
+            return await this._request('GET', `/store/${collection}/${filename}/history/${version}`);
+        },
+
+        /**
+         * Makes a past version the current document (recorded as a new version).
+         * Rejects with a 409 error while STORE_VERSIONING is disabled.
+         * @param {string} collection 
+         * @param {string} filename 
+         * @param {number} version 
+         */
+        restore: async (collection, filename, version) => {
+            const result = await this._request(
+                'POST', `/store/${collection}/${filename}/history/${version}/restore`
+            );
+            this._cacheInvalidate(collection, filename);
+            return result;
+        },
+
+        /**
+         * Sweeps history blobs that no version references.
+         * Retention already reclaims blobs on save; this is for cleaning up
+         * after interrupted saves or manual edits of local_data/.history.
          */
-        get: async (collection, filename) => {
-            return await this._request('GET', `/store/${collection}/${filename}`);
+        collectGarbage: async () => {
+            return await this._request('POST', '/store/history/gc');
         }
     };
 }